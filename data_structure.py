@@ -46,6 +46,9 @@ def sort_and_subtotal(df: pd.DataFrame) -> pd.DataFrame:
         'TOTAL GW': 'sum'
     }).reset_index()
     subtotals['ITEM'] = subtotals['ITEM'] + ' Subtotal'
+    # Key the subtotal rows by item so the assembly loop below does an O(1)
+    # dict lookup instead of a boolean-mask scan of the subtotals frame per group
+    sub_map = subtotals.set_index('ITEM').to_dict('index')
 
     # Calculate grand totals
     grand_total = pd.DataFrame([{
@@ -59,14 +62,16 @@ def sort_and_subtotal(df: pd.DataFrame) -> pd.DataFrame:
     # Combine original data with subtotals and grand total
     # This part needs careful handling to insert subtotals correctly
     # For now, let's just append them for simplicity, and refine later for display
-    result_df = pd.DataFrame(columns=df_sorted.columns)
-    for item in df_sorted['ITEM'].unique():
-        item_data = df_sorted[df_sorted['ITEM'] == item]
-        result_df = pd.concat([result_df, item_data])
-        sub_total_row = subtotals[subtotals['ITEM'] == item + ' Subtotal']
-        result_df = pd.concat([result_df, sub_total_row], ignore_index=True)
+    # Accumulate the pieces in a list and concat once at the end, instead of
+    # growing result_df with a pd.concat per group (which re-copies all rows
+    # already accumulated on every iteration).
+    pieces = []
+    for item, item_data in df_sorted.groupby('ITEM', sort=False):
+        pieces.append(item_data)
+        sub_row = {'ITEM': item + ' Subtotal', **sub_map[item + ' Subtotal']}
+        pieces.append(pd.DataFrame([sub_row]))
 
-    result_df = pd.concat([result_df, grand_total], ignore_index=True)
+    result_df = pd.concat(pieces + [grand_total], ignore_index=True)
 
     return result_df
 
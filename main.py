@@ -1,11 +1,13 @@
 import os
 import sys
+import threading
+import time
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from src.models.user import db
+from src.models.user import db, cleanup_expired_sessions
 from src.routes.user import user_bp
 from src.routes.sheets import sheets_bp
 
@@ -29,6 +31,20 @@ with app.app_context():
     os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
     db.create_all()
 
+# Periodically purge expired sessions so the UserSession table (and the
+# token index consulted on every authenticated request) doesn't grow
+# without bound
+def _session_sweeper():
+    while True:
+        time.sleep(60)
+        with app.app_context():
+            try:
+                cleanup_expired_sessions()
+            except Exception:
+                db.session.rollback()
+
+threading.Thread(target=_session_sweeper, name='session-sweeper', daemon=True).start()
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -1,11 +1,19 @@
 from flask import Blueprint, request, jsonify, session
-from src.models.user import db, User, UserSession
+from src.models.user import db, User, UserSession, USER_LEVELS
+from cachetools import TTLCache
+from sqlalchemy import or_
 from datetime import datetime, timedelta
 import secrets
 import json
 
 user_bp = Blueprint('user', __name__)
 
+# Short-lived cache of session token -> (user_id, expires_at) so the vast
+# majority of authenticated requests skip the session-table query. The TTL
+# bounds how long a token revoked elsewhere keeps working; logout in this
+# process evicts immediately.
+_SESSION_CACHE = TTLCache(maxsize=10_000, ttl=30)
+
 def require_auth(f):
     """Decorator to require authentication."""
     def decorated_function(*args, **kwargs):
@@ -15,12 +23,31 @@ def require_auth(f):
         
         try:
             token = auth_header.split(' ')[1]  # Bearer <token>
-            user_session = UserSession.query.filter_by(session_token=token).first()
-            
-            if not user_session or user_session.is_expired():
+
+            cached = _SESSION_CACHE.get(token)
+            if cached is not None:
+                user_id, expires_at = cached
+                if datetime.utcnow() > expires_at:
+                    _SESSION_CACHE.pop(token, None)
+                    return jsonify({'error': 'Invalid or expired token'}), 401
+                user = db.session.get(User, user_id)
+                if user is None:
+                    _SESSION_CACHE.pop(token, None)
+                    return jsonify({'error': 'Invalid or expired token'}), 401
+                request.current_user = user
+                return f(*args, **kwargs)
+
+            # Fetch the session and its user in one joined query instead of
+            # two round-trips on every authenticated request
+            row = db.session.query(UserSession, User).join(
+                User, User.id == UserSession.user_id
+            ).filter(UserSession.session_token == token).first()
+
+            if not row or row[0].is_expired():
                 return jsonify({'error': 'Invalid or expired token'}), 401
-            
-            request.current_user = User.query.get(user_session.user_id)
+
+            _SESSION_CACHE[token] = (row[1].id, row[0].expires_at)
+            request.current_user = row[1]
             return f(*args, **kwargs)
         except:
             return jsonify({'error': 'Invalid token format'}), 401
@@ -30,20 +57,20 @@ def require_auth(f):
 
 def require_level(level):
     """Decorator to require specific user level."""
+    # Resolved once at decoration time, so the per-request check is a
+    # single integer compare
+    required_rank = USER_LEVELS.get(level, 1)
+
     def decorator(f):
         def decorated_function(*args, **kwargs):
             if not hasattr(request, 'current_user'):
                 return jsonify({'error': 'Authentication required'}), 401
-            
-            user_levels = {'user': 1, 'admin': 2, 'developer': 3}
-            required_level = user_levels.get(level, 1)
-            current_level = user_levels.get(request.current_user.user_level, 1)
-            
-            if current_level < required_level:
+
+            if request.current_user.level_rank < required_rank:
                 return jsonify({'error': 'Insufficient permissions'}), 403
-            
+
             return f(*args, **kwargs)
-        
+
         decorated_function.__name__ = f.__name__
         return decorated_function
     return decorator
@@ -60,11 +87,13 @@ def register():
             if field not in data or not data[field]:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        # Check if user already exists
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already exists'}), 400
-        
-        if User.query.filter_by(email=data['email']).first():
+        # Check if user already exists; one query covers both constraints
+        existing = User.query.with_entities(User.username, User.email).filter(
+            or_(User.username == data['username'], User.email == data['email'])
+        ).first()
+        if existing:
+            if existing.username == data['username']:
+                return jsonify({'error': 'Username already exists'}), 400
             return jsonify({'error': 'Email already exists'}), 400
         
         # Create new user
@@ -141,11 +170,11 @@ def logout():
         auth_header = request.headers.get('Authorization')
         token = auth_header.split(' ')[1]
         
-        user_session = UserSession.query.filter_by(session_token=token).first()
-        if user_session:
-            db.session.delete(user_session)
-            db.session.commit()
-        
+        _SESSION_CACHE.pop(token, None)
+        # Bulk delete avoids the fetch-then-delete round-trip
+        UserSession.query.filter_by(session_token=token).delete()
+        db.session.commit()
+
         return jsonify({'message': 'Logout successful'})
         
     except Exception as e: